@@ -1,14 +1,25 @@
+import io
 import os
 import logging
-import uuid
+import mmap
+import re
+import secrets
 import tempfile
-from flask import Flask, render_template, request, send_file, jsonify, flash, redirect, url_for
-from werkzeug.utils import secure_filename
+import shutil
+import hashlib
+import contextlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, Request, render_template, request, send_file, jsonify, flash, redirect, url_for, g
+from werkzeug.security import safe_join
 from werkzeug.exceptions import RequestEntityTooLarge
 import pdf2docx
 from pathlib import Path
-import PyPDF2
-import tabula
+from urllib.parse import quote
+import pymupdf
 import pandas as pd
 
 # Configure logging
@@ -17,96 +28,272 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
 
+def default_converted_folder():
+    """Prefer RAM-backed tmpfs for converted files, which only live until downloaded."""
+    shm = '/dev/shm'
+    # Container runtimes often mount a tiny /dev/shm; fall back to disk there
+    if os.path.isdir(shm) and shutil.disk_usage(shm).total >= 1024 * 1024 * 1024:
+        return os.path.join(shm, 'buzzy_converted')
+    return 'converted'
+
 # Configuration
-UPLOAD_FOLDER = 'uploads'
-CONVERTED_FOLDER = 'converted'
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+CONVERTED_FOLDER = os.environ.get('CONVERTED_FOLDER') or default_converted_folder()
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB max file size
+SCRATCH_SPACE_RESERVE = 2 * MAX_FILE_SIZE  # Free space needed to accept another conversion
 ALLOWED_EXTENSIONS = {'pdf'}
+PDF_STRUCTURE_SCAN_SIZE = 1024  # Bytes inspected at each end of an upload during validation
+CPU_COUNT = os.cpu_count() or 1
+CONVERSION_WORKERS = int(os.environ.get('CONVERSION_WORKERS', max(1, CPU_COUNT // 2)))  # Conversion jobs run at once
+IN_MEMORY_UPLOAD_MAX_SIZE = 2 * 1024 * 1024  # PDFs up to 2MB are converted straight from memory
+MULTIPROCESSING_MIN_PAGES = 8  # PDFs with at least this many pages are split across several processes
+# Parse processes per job for long PDFs (pdf2docx and table extraction). Each one holds its
+# own copy of the document, so the two levels share one CPU budget: by default half as many
+# jobs as cores run at once and a long PDF is split across two processes.
+MULTIPROCESSING_CPU_COUNT = max(1, CPU_COUNT // max(1, CONVERSION_WORKERS))
+JOB_RETENTION_SECONDS = 600  # How long finished job results stay queryable
+UPLOAD_BUFFER_SIZE = 256 * 1024  # Copy buffer for uploads that are still held in memory
+CONVERTED_CACHE_MAX_SIZE = int(os.environ.get('CONVERTED_CACHE_MAX_SIZE', 512 * 1024 * 1024))
+CONVERTED_FILE_MAX_AGE = int(os.environ.get('CONVERTED_FILE_MAX_AGE', 3600))  # Seconds since last use
+UPLOAD_FILE_MAX_AGE = 3600  # Uploads are consumed within seconds; older ones were orphaned
+REAPER_INTERVAL_SECONDS = 30
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['CONVERTED_FOLDER'] = CONVERTED_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+# Behind a front-end server that honours X-Sendfile, let it stream downloads from disk.
+# nginx instead needs X-Accel-Redirect to an internal location aliased to CONVERTED_FOLDER.
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+app.config['USE_X_SENDFILE'] = (
+    os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes') or bool(X_ACCEL_REDIRECT_PREFIX)
+)
 
 # Ensure upload and converted directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(CONVERTED_FOLDER, exist_ok=True)
 
+class UploadRequest(Request):
+    """Request that spools large file uploads straight into the upload folder.
+    
+    Werkzeug's default puts them in the system temporary directory, from where
+    they would have to be copied; spooled here they can simply be linked.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= IN_MEMORY_UPLOAD_MAX_SIZE:
+            return io.BytesIO()
+        return tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], prefix='spool-', suffix='.part')
+
+app.request_class = UploadRequest
+
+# Background conversion jobs, keyed by job id
+conversion_jobs = {}
+conversion_executor = None
+conversion_executor_lock = threading.Lock()
+
 def allowed_file(filename):
     """Check if the uploaded file has an allowed extension."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def validate_pdf(file_path):
-    """Validate that the uploaded file is a proper PDF."""
+def save_upload(file, dest_path):
+    """Save an uploaded file to dest_path.
+    
+    Large uploads are spooled into the upload folder while the request is
+    parsed (see UploadRequest), so they are hard-linked to dest_path without
+    copying any data. Other spooled files are copied inside the kernel with
+    sendfile(2) instead of being read back through Python in small chunks.
+    """
+    stream = file.stream
+    
+    # The spool file is unlinked when the request closes; the new link keeps its data
+    spool_path = getattr(stream, 'name', None)
+    if isinstance(spool_path, str):
+        stream.flush()
+        try:
+            os.link(spool_path, dest_path)
+            return
+        except OSError:
+            pass
+    
+    # An in-memory SpooledTemporaryFile would be forced to disk by fileno()
+    if hasattr(os, 'sendfile') and getattr(stream, '_rolled', True):
+        try:
+            src_fd = stream.fileno()
+        except (AttributeError, OSError):
+            src_fd = None
+        
+        if src_fd is not None:
+            stream.flush()
+            size = os.fstat(src_fd).st_size
+            with open(dest_path, 'wb') as dest:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(dest.fileno(), src_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            return
+    
+    file.save(dest_path, buffer_size=UPLOAD_BUFFER_SIZE)
+
+def upload_size(file):
+    """Return the size in bytes of an uploaded file."""
+    stream = file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+def has_scratch_space():
+    """Check the upload and converted folders have room for another conversion."""
+    return all(
+        shutil.disk_usage(folder).free >= SCRATCH_SPACE_RESERVE
+        for folder in (UPLOAD_FOLDER, CONVERTED_FOLDER)
+    )
+
+def validate_pdf(pdf):
+    """Check that an uploaded file, given as a path or as bytes, looks like a complete PDF.
+    
+    Any bytes-like buffer, such as an mmap of a saved upload, is accepted in
+    place of bytes.
+    
+    Only the header and trailer are inspected here. The document itself is
+    parsed once, by the conversion job, which also rejects empty and
+    unreadable PDFs.
+    """
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            # Check if PDF has pages and is readable
-            if len(pdf_reader.pages) == 0:
-                return False, "PDF file appears to be empty"
-            
-            # Try to read first page to ensure it's not corrupted
-            first_page = pdf_reader.pages[0]
-            first_page.extract_text()  # This will raise an exception if corrupted
-            
-            return True, "Valid PDF file"
+        # Cheap structural check: header magic at the start, xref trailer at the end
+        if not isinstance(pdf, (str, os.PathLike)):
+            head = pdf[:PDF_STRUCTURE_SCAN_SIZE]
+            tail = pdf[-PDF_STRUCTURE_SCAN_SIZE:]
+        else:
+            # Map the file so only the pages holding the header and trailer are faulted in
+            with open(pdf, 'rb') as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return False, "File is not a valid PDF document"
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    head = mapped[:PDF_STRUCTURE_SCAN_SIZE]
+                    tail = mapped[-PDF_STRUCTURE_SCAN_SIZE:]
+        
+        if b'%PDF-' not in head:
+            return False, "File is not a valid PDF document"
+        
+        if b'startxref' not in tail or b'%%EOF' not in tail:
+            return False, "PDF file is truncated or corrupted"
+        
+        return True, "Valid PDF file"
     except Exception as e:
         logging.error(f"PDF validation error: {str(e)}")
         return False, f"Invalid or corrupted PDF file: {str(e)}"
 
-def convert_pdf_to_docx(pdf_path, docx_path):
-    """Convert PDF to DOCX using pdf2docx library with enhanced error handling."""
+# Validation only checks the file's structure, so encryption is detected once the converters open it
+ENCRYPTED_PDF_MESSAGE = "PDF is password-protected. Please remove the password and try again."
+
+class EncryptedPDFError(Exception):
+    """Raised when a PDF cannot be read without a password."""
+
+# User-facing explanations for library errors, matched in a single pass over the message
+CONVERSION_ERROR_MESSAGES = {
+    'No module named': "Required conversion libraries are not installed",
+    'Permission denied': "File access permission error",
+    'No such file': "Input file could not be found",
+    'No tables found': "No tables detected in the PDF. Make sure the PDF contains tabular data.",
+}
+CONVERSION_ERROR_PATTERN = re.compile('|'.join(map(re.escape, CONVERSION_ERROR_MESSAGES)))
+
+def describe_conversion_error(error_msg, fallback_prefix):
+    """Map a conversion exception message to a friendlier one for the user."""
+    match = CONVERSION_ERROR_PATTERN.search(error_msg)
+    if match:
+        return CONVERSION_ERROR_MESSAGES[match.group()]
+    return f"{fallback_prefix}: {error_msg}"
+
+def convert_pdf_to_docx(pdf, docx_path):
+    """Convert PDF to DOCX using pdf2docx library with enhanced error handling.
+    
+    The PDF may be given as a file path or, for small uploads kept in
+    memory, as bytes.
+    """
     try:
-        logging.info(f"Starting conversion: {pdf_path} -> {docx_path}")
+        in_memory = isinstance(pdf, bytes)
+        logging.info(f"Starting conversion: {'<in-memory PDF>' if in_memory else pdf} -> {docx_path}")
         
         # Validate input file exists and is readable
-        if not os.path.exists(pdf_path):
+        if not in_memory and not os.path.exists(pdf):
             return False, "Input PDF file not found"
         
-        if os.path.getsize(pdf_path) == 0:
+        pdf_size = len(pdf) if in_memory else os.path.getsize(pdf)
+        if pdf_size == 0:
             return False, "PDF file is empty"
         
-        # Use pdf2docx converter with specific settings for better compatibility
-        cv = pdf2docx.Converter(pdf_path)
-        
-        # Convert with enhanced settings to preserve formatting
-        cv.convert(
-            docx_path, 
-            start=0, 
-            end=None,
-            multi_processing=False,  # Disable multiprocessing for stability
-            cpu_count=1  # Use single thread for more reliable conversion
-        )
-        cv.close()
+        # Use absolute paths: the conversion below runs from a scratch directory
+        docx_path = os.path.abspath(docx_path)
+        if not in_memory:
+            pdf = os.path.abspath(pdf)
+        
+        # pdf2docx hands parsed pages between processes as pages-N.json files in the
+        # working directory, so concurrent jobs each need a private one
+        with tempfile.TemporaryDirectory() as scratch_dir, contextlib.chdir(scratch_dir):
+            # Use pdf2docx converter with specific settings for better compatibility
+            if in_memory:
+                cv = pdf2docx.Converter(stream=pdf)
+            else:
+                cv = pdf2docx.Converter(pdf)
+            
+            # pdf2docx would fail later with an error naming the file's path
+            if cv.fitz_doc.needs_pass:
+                cv.close()
+                return False, ENCRYPTED_PDF_MESSAGE
+            
+            page_count = cv.fitz_doc.page_count
+            if page_count == 0:
+                cv.close()
+                return False, "PDF file appears to be empty"
+            
+            # Page parsing dominates conversion time, so long documents are split into page
+            # ranges across processes; short ones are not worth the fork. pdf2docx's own
+            # Pool() starts os.cpu_count() processes, but only cpu_count of them get pages.
+            cpu_count = min(MULTIPROCESSING_CPU_COUNT, page_count)
+            multi_processing = cpu_count > 1 and page_count >= MULTIPROCESSING_MIN_PAGES
+            
+            # The worker processes reopen the PDF by name, so in-memory uploads are spilled first
+            if multi_processing and in_memory:
+                cv.close()
+                spilled_pdf_path = os.path.join(scratch_dir, 'source.pdf')
+                with open(spilled_pdf_path, 'wb') as spilled_pdf:
+                    spilled_pdf.write(pdf)
+                cv = pdf2docx.Converter(spilled_pdf_path)
+            
+            cv.convert(
+                docx_path, 
+                start=0, 
+                end=None,
+                multi_processing=multi_processing,
+                cpu_count=cpu_count
+            )
+            cv.close()
         
-        # Validate output file was created and has content
-        if not os.path.exists(docx_path):
+        # Validate output file was created and has content. A DOCX is a zip archive, so
+        # the local file header magic is enough to catch a broken write.
+        try:
+            with open(docx_path, 'rb') as docx_file:
+                magic = docx_file.read(4)
+        except FileNotFoundError:
             return False, "DOCX file was not created"
         
-        if os.path.getsize(docx_path) == 0:
+        if not magic:
             return False, "Generated DOCX file is empty"
         
-        # Basic validation - try to read the file as a DOCX
-        try:
-            from zipfile import ZipFile, BadZipFile
-            with ZipFile(docx_path, 'r') as zip_file:
-                # Check if it contains the required DOCX structure
-                required_files = ['[Content_Types].xml', 'word/document.xml']
-                zip_contents = zip_file.namelist()
-                
-                for required_file in required_files:
-                    if required_file not in zip_contents:
-                        logging.warning(f"DOCX structure check: Missing {required_file}")
-                        
-        except BadZipFile:
+        if magic != b'PK\x03\x04':
             return False, "Generated file is not a valid DOCX format"
-        except Exception as validation_error:
-            logging.warning(f"DOCX validation warning: {str(validation_error)}")
-            # Continue anyway as the file might still be usable
         
         logging.info(f"Conversion completed successfully: {docx_path}")
         return True, "Conversion completed successfully"
         
+    except pymupdf.FileDataError as e:
+        logging.error(f"Unreadable PDF: {str(e)}")
+        return False, f"Invalid or corrupted PDF file: {str(e)}"
     except ImportError as e:
         logging.error(f"Missing required library: {str(e)}")
         return False, "Conversion library not available. Please contact support."
@@ -115,20 +302,108 @@ def convert_pdf_to_docx(pdf_path, docx_path):
         return False, "File too large or complex for conversion. Try a smaller file."
     except Exception as e:
         logging.error(f"Conversion error: {str(e)}")
-        error_msg = str(e)
         
         # Provide more user-friendly error messages
-        if "No module named" in error_msg:
-            return False, "Required conversion libraries are not installed"
-        elif "Permission denied" in error_msg:
-            return False, "File access permission error"
-        elif "No such file" in error_msg:
-            return False, "Input file could not be found"
-        else:
-            return False, f"Conversion failed: {error_msg}"
+        return False, describe_conversion_error(str(e), "Conversion failed")
+
+def find_page_tables(pdf_document, strategy, start, stop):
+    """Return the tables on pages start to stop-1 of an open document, each as a list of rows."""
+    tables = []
+    for page in pdf_document.pages(start, stop):
+        for table in page.find_tables(strategy=strategy):
+            # Empty cells come back as '' or None; make both missing values
+            rows = [[cell or None for cell in row] for row in table.extract()]
+            if rows:
+                tables.append(rows)
+    return tables
+
+def find_page_range_tables(pdf_path, strategy, start, stop):
+    """Pool task: open the PDF in this process and find the tables on one page range."""
+    with pymupdf.open(pdf_path) as pdf_document:
+        return find_page_tables(pdf_document, strategy, start, stop)
+
+def extract_pdf_tables(pdf_path):
+    """Extract every table in the PDF as a DataFrame, using each table's first row as header.
+    
+    Tables with ruling lines are looked for first; if the document has none,
+    tables are detected from text alignment instead. Long documents are
+    split into page ranges searched by several processes at once.
+    """
+    with contextlib.ExitStack() as stack:
+        pdf_document = stack.enter_context(pymupdf.open(pdf_path))
+        if pdf_document.needs_pass:
+            raise EncryptedPDFError(ENCRYPTED_PDF_MESSAGE)
+        page_count = pdf_document.page_count
+        
+        # Same split as pdf2docx uses for DOCX conversion: one contiguous page range per process
+        cpu_count = min(MULTIPROCESSING_CPU_COUNT, page_count)
+        pool = None
+        if cpu_count > 1 and page_count >= MULTIPROCESSING_MIN_PAGES:
+            pool = stack.enter_context(multiprocessing.Pool(cpu_count))
+            bounds = [page_count * k // cpu_count for k in range(cpu_count + 1)]
+            page_ranges = list(zip(bounds, bounds[1:]))
+        
+        for strategy in ('lines', 'text'):
+            if pool is None:
+                tables = find_page_tables(pdf_document, strategy, 0, page_count)
+            else:
+                range_tables = pool.starmap(
+                    find_page_range_tables,
+                    [(pdf_path, strategy, start, stop) for start, stop in page_ranges]
+                )
+                tables = [rows for chunk in range_tables for rows in chunk]
+            
+            dfs = [pd.DataFrame(rows[1:], columns=rows[0]) for rows in tables]
+            if any(not df.empty for df in dfs):
+                return dfs
+    
+    return []
+
+def infer_numeric_columns(df):
+    """Convert columns whose values all parse as numbers from text to numeric dtype."""
+    for column_index in range(df.shape[1]):
+        values = df.iloc[:, column_index]
+        numbers = pd.to_numeric(values, errors='coerce')
+        if values.notna().any() and numbers.notna().sum() == values.notna().sum():
+            df.isetitem(column_index, numbers)
+    return df
+
+# Header text that stands for a missing column name once a cell is stringified
+PLACEHOLDER_HEADERS = frozenset({'', 'nan', 'none'})
+
+# Currency signs and thousands separators that may decorate numbers extracted as text
+NUMERIC_TEXT_NOISE = re.compile(r'[,$]')
+
+def is_numeric_column(values):
+    """Check whether a column holds only numbers, allowing '$' and ',' in numbers kept as text."""
+    if pd.api.types.is_numeric_dtype(values):
+        return True
+    
+    present = values.dropna()
+    if present.empty:
+        return False
+    
+    stripped = present.astype(str).str.replace(NUMERIC_TEXT_NOISE, '', regex=True)
+    return bool(pd.to_numeric(stripped, errors='coerce').notna().all())
+
+def drop_empty_rows_and_columns(df):
+    """Drop all-empty rows and columns using a single missing-value mask."""
+    missing = df.isna().to_numpy()
+    return df.iloc[~missing.all(axis=1), ~missing.all(axis=0)]
+
+# Cell styles for generated spreadsheets, as xlsxwriter format properties
+EXCEL_HEADER_STYLE = {
+    'bold': True, 'font_size': 11, 'font_name': 'Arial',
+    'bg_color': '#E6E6FA', 'align': 'center', 'valign': 'vcenter',
+    'text_wrap': True, 'border': 2
+}
+EXCEL_DATA_STYLE = {'font_size': 10, 'font_name': 'Arial', 'valign': 'vcenter'}
+EXCEL_TEXT_STYLE = {**EXCEL_DATA_STYLE, 'align': 'left'}
+EXCEL_NUMBER_STYLE = {**EXCEL_DATA_STYLE, 'align': 'right'}
+EXCEL_DATA_BORDER_STYLE = {'border': 1}
 
 def convert_pdf_to_excel(pdf_path, xlsx_path):
-    """Convert PDF to Excel using tabula-py library with enhanced formatting preservation."""
+    """Convert PDF to Excel using PyMuPDF table detection with enhanced formatting preservation."""
     try:
         logging.info(f"Starting PDF to Excel conversion: {pdf_path} -> {xlsx_path}")
         
@@ -139,61 +414,13 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
         if os.path.getsize(pdf_path) == 0:
             return False, "PDF file is empty"
         
-        # Extract all tables from the PDF with enhanced header detection
+        # Extract all tables in-process with PyMuPDF's native table finder
         try:
-            # First attempt: Preserve headers with explicit header detection
-            dfs = tabula.read_pdf(
-                pdf_path, 
-                pages='all',
-                multiple_tables=True,
-                pandas_options={'header': [0]},  # Explicitly use first row as header
-                lattice=True,
-                stream=False,
-                guess=False,
-                area=None,
-                relative_area=True,
-                relative_columns=True
-            )
-            
-            # Second attempt: Try with multiple header rows for complex tables
-            if not dfs or len(dfs) == 0 or any(df.empty for df in dfs):
-                dfs = tabula.read_pdf(
-                    pdf_path, 
-                    pages='all',
-                    multiple_tables=True,
-                    pandas_options={'header': [0, 1]},  # Try multi-row headers
-                    lattice=True,
-                    stream=False,
-                    guess=False
-                )
-            
-            # Third attempt: Stream mode with header preservation
-            if not dfs or len(dfs) == 0 or any(df.empty for df in dfs):
-                dfs = tabula.read_pdf(
-                    pdf_path, 
-                    pages='all',
-                    multiple_tables=True,
-                    pandas_options={'header': 0},  # Single header row
-                    stream=True,
-                    guess=True,
-                    relative_area=True,
-                    relative_columns=True
-                )
-            
-            # Fourth attempt: Raw extraction with manual header handling
-            if not dfs or len(dfs) == 0 or any(df.empty for df in dfs):
-                dfs = tabula.read_pdf(
-                    pdf_path,
-                    pages='all',
-                    multiple_tables=True,
-                    pandas_options={'header': None},  # No automatic header
-                    lattice=False,
-                    stream=True,
-                    guess=True
-                )
-                
-        except Exception as tabula_error:
-            logging.warning(f"Tabula extraction error: {str(tabula_error)}")
+            dfs = extract_pdf_tables(pdf_path)
+        except (pymupdf.FileDataError, EncryptedPDFError):
+            raise
+        except Exception as extraction_error:
+            logging.warning(f"Table extraction error: {str(extraction_error)}")
             # Last resort: try to extract any data
             dfs = []
             
@@ -202,15 +429,6 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
         
         for i, df in enumerate(dfs):
             if df is not None and not df.empty:
-                # Handle multi-level column headers
-                if hasattr(df.columns, 'nlevels') and df.columns.nlevels > 1:
-                    # Flatten multi-level columns
-                    df.columns = [
-                        ' '.join([str(c) for c in col if not pd.isna(c) and str(c).strip() != '']) 
-                        if isinstance(col, tuple) else str(col)
-                        for col in df.columns
-                    ]
-                
                 # Clean up column names - preserve original names when possible
                 new_columns = []
                 first_row_used_as_header = False
@@ -221,17 +439,12 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
                     # Check if this looks like an actual header (not just "Unnamed")
                     if (col_str.startswith('Unnamed') or 
                         pd.isna(col) or 
-                        col_str == '' or
-                        col_str == 'nan' or
-                        col_str.lower() == 'none'):
+                        col_str.lower() in PLACEHOLDER_HEADERS):
                         
                         # Try to use the first row as header if columns are unnamed
                         if len(df) > 0 and j < len(df.columns):
                             potential_header = str(df.iloc[0, j]).strip()
-                            if (potential_header and 
-                                potential_header != 'nan' and 
-                                potential_header.lower() != 'none' and 
-                                len(potential_header) > 0 and
+                            if (potential_header.lower() not in PLACEHOLDER_HEADERS and
                                 not potential_header.isdigit()):  # Avoid using numbers as headers
                                 new_columns.append(potential_header)
                                 first_row_used_as_header = True
@@ -248,9 +461,11 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
                 if first_row_used_as_header and len(df) > 0:
                     df = df.iloc[1:].reset_index(drop=True)
                 
+                # Store numeric columns as numbers rather than text
+                df = infer_numeric_columns(df)
+                
                 # Remove completely empty rows and columns
-                df = df.dropna(axis=0, how='all')  # Remove empty rows
-                df = df.dropna(axis=1, how='all')  # Remove empty columns
+                df = drop_empty_rows_and_columns(df)
                 
                 # Only keep dataframes that have actual data
                 if len(df) > 0 and len(df.columns) > 0:
@@ -263,116 +478,64 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
         if not dfs or len(dfs) == 0:
             return False, "No tables or data found in the PDF. The file might contain only images or be a scanned document."
         
-        # Create Excel writer with formatting options
-        with pd.ExcelWriter(xlsx_path, engine='openpyxl') as writer:
-            for i, df in enumerate(dfs):
-                # Clean up the dataframe
-                if df is not None and not df.empty:
-                    # Remove completely empty rows and columns
-                    df = df.dropna(how='all').dropna(axis=1, how='all')
-                    
-                    # If dataframe still has data, write it to Excel
-                    if not df.empty:
-                        sheet_name = f'Table_{i+1}' if len(dfs) > 1 else 'Data'
-                        
-                        # Ensure sheet name is valid (max 31 chars, no special chars)
-                        sheet_name = sheet_name[:31].replace('/', '_').replace('\\', '_')
-                        
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # Get the worksheet to apply formatting
-                        worksheet = writer.sheets[sheet_name]
-                        
-                        # Enhanced formatting and styling
-                        from openpyxl.styles import Border, Side, Font, Alignment, PatternFill
-                        from openpyxl.utils import get_column_letter
-                        
-                        # Auto-adjust column widths with better calculation
-                        for column in worksheet.columns:
-                            max_length = 0
-                            column_letter = column[0].column_letter
-                            
-                            for cell in column:
-                                try:
-                                    # Consider both content length and cell formatting
-                                    cell_length = len(str(cell.value)) if cell.value is not None else 0
-                                    if cell_length > max_length:
-                                        max_length = cell_length
-                                except:
-                                    pass
-                            
-                            # Set column width with better scaling
-                            if max_length > 0:
-                                adjusted_width = min(max(max_length + 4, 10), 60)  # Min 10, Max 60
-                                worksheet.column_dimensions[column_letter].width = adjusted_width
-                            else:
-                                worksheet.column_dimensions[column_letter].width = 12
-                        
-                        # Define enhanced styling
-                        header_font = Font(bold=True, size=11, name='Arial')
-                        header_fill = PatternFill(start_color='E6E6FA', end_color='E6E6FA', fill_type='solid')
-                        header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                        
-                        data_font = Font(size=10, name='Arial')
-                        data_alignment = Alignment(vertical='center', wrap_text=False)
-                        
-                        # Enhanced border styles
-                        thick_border = Border(
-                            left=Side(style='medium'),
-                            right=Side(style='medium'),
-                            top=Side(style='medium'),
-                            bottom=Side(style='medium')
-                        )
-                        
-                        thin_border = Border(
-                            left=Side(style='thin'),
-                            right=Side(style='thin'),
-                            top=Side(style='thin'),
-                            bottom=Side(style='thin')
-                        )
-                        
-                        # Apply enhanced formatting to all cells
-                        for row_idx, row in enumerate(worksheet.iter_rows(min_row=1, max_row=worksheet.max_row, 
-                                                                        min_col=1, max_col=worksheet.max_column), 1):
-                            for col_idx, cell in enumerate(row, 1):
-                                if cell.value is not None:
-                                    # Apply borders
-                                    cell.border = thick_border if row_idx == 1 else thin_border
-                                    
-                                    # Apply fonts and alignment
-                                    if row_idx == 1:  # Header row
-                                        cell.font = header_font
-                                        cell.fill = header_fill
-                                        cell.alignment = header_alignment
-                                    else:  # Data rows
-                                        cell.font = data_font
-                                        cell.alignment = data_alignment
-                                        
-                                        # Try to detect numeric values for right alignment
-                                        try:
-                                            float(str(cell.value).replace(',', '').replace('$', ''))
-                                            cell.alignment = Alignment(horizontal='right', vertical='center')
-                                        except (ValueError, AttributeError):
-                                            # Keep left alignment for text
-                                            cell.alignment = Alignment(horizontal='left', vertical='center')
-                        
-                        # Set row heights for better appearance
-                        for row in range(1, worksheet.max_row + 1):
-                            if row == 1:  # Header row
-                                worksheet.row_dimensions[row].height = 25
-                            else:  # Data rows
-                                worksheet.row_dimensions[row].height = 18
-                        
-                        # Freeze header row for better navigation
-                        if worksheet.max_row > 1:
-                            worksheet.freeze_panes = 'A2'
-                        
-                        logging.info(f"Added sheet '{sheet_name}' with {len(df)} rows")
+        # Create Excel writer; in constant_memory mode xlsxwriter flushes each row to disk
+        # as soon as the next one starts, so memory stays flat however large the tables are
+        with pd.ExcelWriter(
+            xlsx_path, engine='xlsxwriter', engine_kwargs={'options': {'constant_memory': True}}
+        ) as writer:
+            workbook = writer.book
+            
+            # Formats belong to a workbook, so they are registered once per file from the shared styles
+            header_format = workbook.add_format(EXCEL_HEADER_STYLE)
+            text_format = workbook.add_format(EXCEL_TEXT_STYLE)
+            number_format = workbook.add_format(EXCEL_NUMBER_STYLE)
+            data_border_format = workbook.add_format(EXCEL_DATA_BORDER_STYLE)
             
-            # If no valid data was written, create an empty sheet with a message
-            if not writer.sheets:
-                df_empty = pd.DataFrame({'Message': ['No tabular data found in the PDF file.']})
-                df_empty.to_excel(writer, sheet_name='Notice', index=False)
+            # Every table was already cleaned and is known to be non-empty
+            for i, df in enumerate(dfs):
+                sheet_name = f'Table_{i+1}' if len(dfs) > 1 else 'Data'
+                
+                # Ensure sheet name is valid (max 31 chars, no special chars)
+                sheet_name = sheet_name[:31].replace('/', '_').replace('\\', '_')
+                
+                worksheet = workbook.add_worksheet(sheet_name)
+                row_count, column_count = df.shape
+                
+                # Column widths from the longest header or value, computed per column in pandas
+                header_lengths = pd.Series([len(str(col)) for col in df.columns], index=df.columns)
+                value_lengths = df.apply(lambda column: column.dropna().astype(str).str.len().max())
+                max_lengths = pd.concat([header_lengths, value_lengths.fillna(0)], axis=1).max(axis=1)
+                
+                # Min 10, Max 60, or 12 for a column with nothing in it
+                widths = (max_lengths + 4).clip(10, 60).where(max_lengths > 0, 12)
+                
+                for col_idx, width in enumerate(widths):
+                    # The column format styles every data cell below the header,
+                    # right-aligning numeric columns and left-aligning text ones
+                    column_format = number_format if is_numeric_column(df.iloc[:, col_idx]) else text_format
+                    worksheet.set_column(col_idx, col_idx, width, column_format)
+                
+                # Rows must be written strictly top to bottom (to_excel goes column by
+                # column). The header row carries its own format; data goes under it
+                # unformatted, with missing values left as blank cells.
+                worksheet.set_row(0, 25)
+                worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+                rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+                for row_idx, row in enumerate(rows, start=1):
+                    worksheet.write_row(row_idx, 0, row)
+                
+                # Thin borders on every non-empty data cell with a single range rule
+                worksheet.conditional_format(1, 0, row_count, column_count - 1, {
+                    'type': 'no_blanks', 'format': data_border_format
+                })
+                
+                # Set row heights for better appearance
+                worksheet.set_default_row(18)
+                
+                # Freeze header row for better navigation
+                worksheet.freeze_panes(1, 0)
+                
+                logging.info(f"Added sheet '{sheet_name}' with {len(df)} rows")
         
         # Validate output file was created and has content
         if not os.path.exists(xlsx_path):
@@ -384,6 +547,12 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
         logging.info(f"PDF to Excel conversion completed successfully: {xlsx_path}")
         return True, "PDF to Excel conversion completed successfully"
         
+    except EncryptedPDFError as e:
+        logging.error(f"Encrypted PDF: {pdf_path}")
+        return False, str(e)
+    except pymupdf.FileDataError as e:
+        logging.error(f"Unreadable PDF: {str(e)}")
+        return False, f"Invalid or corrupted PDF file: {str(e)}"
     except ImportError as e:
         logging.error(f"Missing required library for Excel conversion: {str(e)}")
         return False, "Excel conversion library not available. Please contact support."
@@ -392,19 +561,180 @@ def convert_pdf_to_excel(pdf_path, xlsx_path):
         return False, "File too large or complex for conversion. Try a smaller file."
     except Exception as e:
         logging.error(f"PDF to Excel conversion error: {str(e)}")
-        error_msg = str(e)
         
         # Provide more user-friendly error messages
-        if "Java" in error_msg:
-            return False, "Java runtime required for PDF processing is not available"
-        elif "No tables found" in error_msg:
-            return False, "No tables detected in the PDF. Make sure the PDF contains tabular data."
-        elif "Permission denied" in error_msg:
-            return False, "File access permission error"
-        elif "No such file" in error_msg:
-            return False, "Input file could not be found"
-        else:
-            return False, f"PDF to Excel conversion failed: {error_msg}"
+        return False, describe_conversion_error(str(e), "PDF to Excel conversion failed")
+
+def warm_conversion_worker():
+    """Process pool initializer: pay one-off library setup before the first real job.
+    
+    pdf2docx and PyMuPDF do a fair amount of lazy initialisation on their first
+    conversion, and pandas only imports xlsxwriter when a workbook is written.
+    Warming up is best effort: an exception raised from a pool initializer
+    would mark the whole pool broken.
+    """
+    try:
+        import xlsxwriter  # noqa: F401
+        
+        # The page needs some text, or pdf2docx warns that it may be a scanned PDF
+        with pymupdf.open() as warmup_document:
+            warmup_document.new_page().insert_text((72, 72), "Buzzy Conversion")
+            warmup_pdf = warmup_document.tobytes()
+        
+        cv = pdf2docx.Converter(stream=warmup_pdf)
+        cv.convert(io.BytesIO())
+        cv.close()
+    except Exception as e:
+        logging.warning(f"Conversion worker warm-up failed: {str(e)}")
+
+def get_conversion_executor():
+    """Return the process pool running background conversions, creating it on first use."""
+    global conversion_executor
+    with conversion_executor_lock:
+        if conversion_executor is None:
+            # Workers must not be forked from this multi-threaded server process, where
+            # request and reaper threads may hold locks at the moment of the fork
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            conversion_executor = ProcessPoolExecutor(
+                max_workers=CONVERSION_WORKERS,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=warm_conversion_worker
+            )
+            # With these start methods a worker is only spawned when a job is submitted, so
+            # its warm-up would run just before that job; start all of them now with no-ops
+            for _ in range(CONVERSION_WORKERS):
+                conversion_executor.submit(os.getpid)
+        return conversion_executor
+
+def replace_broken_conversion_executor(broken_executor):
+    """Discard a process pool that lost a worker and return a fresh one.
+    
+    A worker killed mid-job (out of memory, a crash in MuPDF) leaves a
+    ProcessPoolExecutor permanently unusable, so it has to be rebuilt.
+    """
+    global conversion_executor
+    with conversion_executor_lock:
+        # Another request may already have replaced it
+        if conversion_executor is broken_executor:
+            logging.error("Conversion worker died; starting a new process pool")
+            broken_executor.shutdown(wait=False, cancel_futures=True)
+            conversion_executor = None
+    return get_conversion_executor()
+
+def run_docx_conversion(pdf, docx_path):
+    """Background job: convert an uploaded PDF into the DOCX cache, then remove the upload if on disk."""
+    # Write under a temporary name so a half-written file is never served as a cache hit
+    partial_path = f"{docx_path}.{os.getpid()}.part"
+    try:
+        conversion_success, conversion_message = convert_pdf_to_docx(pdf, partial_path)
+        if conversion_success:
+            os.replace(partial_path, docx_path)
+        return conversion_success, conversion_message
+    finally:
+        cleanup_paths = [partial_path] if isinstance(pdf, bytes) else [pdf, partial_path]
+        for path in cleanup_paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def run_excel_conversion(pdf_path, xlsx_path):
+    """Background job: extract an uploaded PDF's tables into a workbook, then remove the upload."""
+    try:
+        return convert_pdf_to_excel(pdf_path, xlsx_path)
+    finally:
+        try:
+            os.remove(pdf_path)
+        except FileNotFoundError:
+            pass
+
+def remove_files_older_than(folder, cutoff):
+    """Delete regular files in folder last modified before the cutoff timestamp."""
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith('.') and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                    logging.info(f"Expired file: {entry.path}")
+                except FileNotFoundError:
+                    pass
+
+def evict_converted_files():
+    """Delete the least recently used converted files until the folder fits its size cap."""
+    entries = []
+    total_size = 0
+    with os.scandir(CONVERTED_FOLDER) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+    
+    for _, size, path in sorted(entries):
+        if total_size <= CONVERTED_CACHE_MAX_SIZE:
+            break
+        try:
+            os.remove(path)
+            logging.info(f"Evicted converted file: {path}")
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+def submit_conversion_job(func, *args, **result):
+    """Queue a conversion in the background and return its job id.
+    
+    Extra keyword arguments are returned to the client alongside the
+    conversion outcome once the job finishes.
+    """
+    executor = get_conversion_executor()
+    try:
+        future = executor.submit(func, *args)
+    except BrokenProcessPool:
+        future = replace_broken_conversion_executor(executor).submit(func, *args)
+    
+    job_id = secrets.token_urlsafe(12)
+    conversion_jobs[job_id] = {
+        'future': future,
+        'created': time.time(),
+        'result': result,
+    }
+    return job_id
+
+def prune_conversion_jobs():
+    """Forget finished jobs older than the retention window."""
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id, job in list(conversion_jobs.items()):
+        if job['created'] < cutoff and job['future'].done():
+            conversion_jobs.pop(job_id, None)
+
+def reap_expired_files():
+    """Background thread: expire stale uploads, converted files and finished job records."""
+    while True:
+        time.sleep(REAPER_INTERVAL_SECONDS)
+        try:
+            now = time.time()
+            remove_files_older_than(UPLOAD_FOLDER, now - UPLOAD_FILE_MAX_AGE)
+            remove_files_older_than(CONVERTED_FOLDER, now - CONVERTED_FILE_MAX_AGE)
+            evict_converted_files()
+            prune_conversion_jobs()
+        except Exception as e:
+            logging.error(f"File reaper error: {str(e)}")
+
+# One reaper and one warm conversion pool per server process; pool workers must not start their own.
+# Spawned workers re-import the main module before parent_process() is set, but already carry their name.
+if multiprocessing.parent_process() is None and multiprocessing.current_process().name == 'MainProcess':
+    threading.Thread(target=reap_expired_files, name='file-reaper', daemon=True).start()
+    get_conversion_executor()
+
+@app.teardown_request
+def discard_pending_upload(exc):
+    """Remove an upload the request saved but did not hand over to a background job."""
+    pdf_path = g.pop('pending_upload', None)
+    if pdf_path:
+        try:
+            os.remove(pdf_path)
+        except FileNotFoundError:
+            pass
 
 @app.route('/')
 def home():
@@ -420,6 +750,10 @@ def pdf_tools():
 def upload_file():
     """Handle file upload and conversion."""
     try:
+        # Reject oversize uploads from the declared length, before any of the body is read
+        if request.content_length and request.content_length > MAX_FILE_SIZE:
+            return jsonify({'success': False, 'error': 'File too large. Maximum size is 50MB.'}), 413
+        
         # Check if file is in request
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file selected'})
@@ -434,61 +768,90 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'error': 'Only PDF files are allowed'})
         
-        # Generate unique filename
-        unique_id = str(uuid.uuid4())
-        original_filename = secure_filename(file.filename or "document.pdf")
-        pdf_filename = f"{unique_id}_{original_filename}"
-        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_filename)
+        # Refuse work when the scratch filesystem (possibly tmpfs) is nearly full
+        if not has_scratch_space():
+            return jsonify({'success': False, 'error': 'Server is busy. Please try again in a few minutes.'}), 503
         
-        # Save uploaded file
-        file.save(pdf_path)
-        logging.info(f"File saved: {pdf_path}")
+        # Store under a random token; the original name only travels in the download URL
+        token = secrets.token_urlsafe(12)
+        original_stem = Path(file.filename).stem or 'document'
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{token}.pdf")
+        
+        # Small PDFs stay in memory from upload to conversion; larger ones are saved to disk
+        if upload_size(file) <= IN_MEMORY_UPLOAD_MAX_SIZE:
+            pdf_source = file.stream.read()
+        else:
+            save_upload(file, pdf_path)
+            g.pending_upload = pdf_path  # Removed after the request unless handed to the worker
+            logging.info(f"File saved: {pdf_path}")
+            pdf_source = pdf_path
+        
+        # Identical PDFs convert to identical DOCX files, so results are cached by content hash.
+        # A saved upload is mapped once and both hashed and validated from the mapping.
+        if isinstance(pdf_source, bytes):
+            digest = hashlib.sha256(pdf_source).hexdigest()
+            is_valid, validation_message = validate_pdf(pdf_source)
+        else:
+            with open(pdf_path, 'rb') as pdf_file, \
+                    mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest = hashlib.sha256(mapped).hexdigest()
+                is_valid, validation_message = validate_pdf(mapped)
         
-        # Validate PDF file
-        is_valid, validation_message = validate_pdf(pdf_path)
         if not is_valid:
-            # Clean up uploaded file
-            os.remove(pdf_path)
             return jsonify({'success': False, 'error': validation_message})
         
-        # Generate output filename
-        docx_filename = f"{unique_id}_{Path(original_filename).stem}.docx"
+        docx_filename = f"{digest}.docx"
         docx_path = os.path.join(app.config['CONVERTED_FOLDER'], docx_filename)
+        download_name = f"{original_stem}.docx"
+        download_url = url_for('download_file', filename=docx_filename, name=download_name)
         
-        # Convert PDF to DOCX
-        conversion_success, conversion_message = convert_pdf_to_docx(pdf_path, docx_path)
-        
-        # Clean up uploaded PDF file
-        os.remove(pdf_path)
-        
-        if not conversion_success:
-            return jsonify({'success': False, 'error': conversion_message})
+        # Touching the cached file both detects a hit and marks it recently used for eviction
+        try:
+            os.utime(docx_path)
+            cache_hit = True
+        except FileNotFoundError:
+            cache_hit = False
+        
+        if cache_hit:
+            logging.info(f"Serving cached conversion: {docx_path}")
+            return jsonify({
+                'success': True,
+                'message': 'File converted successfully',
+                'download_url': download_url,
+                'filename': download_name
+            })
+        
+        # Convert PDF to DOCX in the background; the worker removes any saved upload
+        job_id = submit_conversion_job(
+            run_docx_conversion, pdf_source, docx_path,
+            message='File converted successfully',
+            download_url=download_url,
+            filename=download_name
+        )
+        g.pop('pending_upload', None)
         
-        # Return success with download URL
+        # Return the job handle for the client to poll
         return jsonify({
-            'success': True, 
-            'message': 'File converted successfully',
-            'download_url': url_for('download_file', filename=docx_filename),
-            'filename': f"{Path(original_filename).stem}.docx"
-        })
+            'success': True,
+            'status': 'queued',
+            'job_id': job_id,
+            'status_url': url_for('conversion_status', job_id=job_id)
+        }), 202
         
     except RequestEntityTooLarge:
         return jsonify({'success': False, 'error': 'File too large. Maximum size is 50MB.'})
     except Exception as e:
         logging.error(f"Upload error: {str(e)}")
-        # Clean up files if they exist
-        try:
-            if 'pdf_path' in locals() and 'pdf_path' in vars():
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-        except:
-            pass
         return jsonify({'success': False, 'error': f'An error occurred: {str(e)}'})
 
 @app.route('/upload-excel', methods=['POST'])
 def upload_file_excel():
     """Handle file upload and conversion to Excel."""
     try:
+        # Reject oversize uploads from the declared length, before any of the body is read
+        if request.content_length and request.content_length > MAX_FILE_SIZE:
+            return jsonify({'success': False, 'error': 'File too large. Maximum size is 50MB.'}), 413
+        
         # Check if file is in request
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file selected'})
@@ -503,95 +866,117 @@ def upload_file_excel():
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'error': 'Only PDF files are allowed'})
         
-        # Generate unique filename
-        unique_id = str(uuid.uuid4())
-        original_filename = secure_filename(file.filename or "document.pdf")
-        pdf_filename = f"{unique_id}_{original_filename}"
-        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_filename)
+        # Refuse work when the scratch filesystem (possibly tmpfs) is nearly full
+        if not has_scratch_space():
+            return jsonify({'success': False, 'error': 'Server is busy. Please try again in a few minutes.'}), 503
+        
+        # Store under a random token; the original name only travels in the download URL
+        token = secrets.token_urlsafe(12)
+        original_stem = Path(file.filename).stem or 'document'
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{token}.pdf")
         
         # Save uploaded file
-        file.save(pdf_path)
+        save_upload(file, pdf_path)
+        g.pending_upload = pdf_path
         logging.info(f"File saved for Excel conversion: {pdf_path}")
         
         # Validate PDF file
         is_valid, validation_message = validate_pdf(pdf_path)
         if not is_valid:
-            # Clean up uploaded file
-            os.remove(pdf_path)
             return jsonify({'success': False, 'error': validation_message})
         
         # Generate output filename
-        xlsx_filename = f"{unique_id}_{Path(original_filename).stem}.xlsx"
+        xlsx_filename = f"{token}.xlsx"
         xlsx_path = os.path.join(app.config['CONVERTED_FOLDER'], xlsx_filename)
+        download_name = f"{original_stem}.xlsx"
+        
+        # Convert PDF to Excel in the background; the worker removes the saved upload
+        job_id = submit_conversion_job(
+            run_excel_conversion, pdf_path, xlsx_path,
+            message='PDF to Excel conversion completed successfully',
+            download_url=url_for('download_file', filename=xlsx_filename, name=download_name),
+            filename=download_name
+        )
+        g.pop('pending_upload', None)
         
-        # Convert PDF to Excel
-        conversion_success, conversion_message = convert_pdf_to_excel(pdf_path, xlsx_path)
-        
-        # Clean up uploaded PDF file
-        os.remove(pdf_path)
-        
-        if not conversion_success:
-            return jsonify({'success': False, 'error': conversion_message})
-        
-        # Return success with download URL
+        # Return the job handle for the client to poll
         return jsonify({
-            'success': True, 
-            'message': 'PDF to Excel conversion completed successfully',
-            'download_url': url_for('download_file', filename=xlsx_filename),
-            'filename': f"{Path(original_filename).stem}.xlsx"
-        })
+            'success': True,
+            'status': 'queued',
+            'job_id': job_id,
+            'status_url': url_for('conversion_status', job_id=job_id)
+        }), 202
         
     except RequestEntityTooLarge:
         return jsonify({'success': False, 'error': 'File too large. Maximum size is 50MB.'})
     except Exception as e:
         logging.error(f"Excel upload error: {str(e)}")
-        # Clean up files if they exist
-        try:
-            if 'pdf_path' in locals() and 'pdf_path' in vars():
-                if os.path.exists(pdf_path):
-                    os.remove(pdf_path)
-        except:
-            pass
         return jsonify({'success': False, 'error': f'An error occurred: {str(e)}'})
 
+@app.route('/status/<job_id>')
+def conversion_status(job_id):
+    """Report the state of a background conversion job."""
+    job = conversion_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'status': 'failed', 'error': 'Conversion job not found or expired'}), 404
+    
+    # Future.running() is also true for jobs merely waiting in the executor's call
+    # queue, so it cannot tell a started job from a queued one
+    future = job['future']
+    if not future.done():
+        return jsonify({'success': True, 'status': 'queued'})
+    
+    error = future.exception()
+    if error is not None:
+        logging.error(f"Conversion job {job_id} crashed: {str(error)}")
+        return jsonify({'success': False, 'status': 'failed', 'error': f'An error occurred: {str(error)}'})
+    
+    conversion_success, conversion_message = future.result()
+    if not conversion_success:
+        return jsonify({'success': False, 'status': 'failed', 'error': conversion_message})
+    
+    return jsonify({
+        'success': True,
+        'status': 'finished',
+        **job['result']
+    })
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """Handle file download."""
     try:
-        file_path = os.path.join(app.config['CONVERTED_FOLDER'], filename)
-        
-        if not os.path.exists(file_path):
-            flash('File not found or expired', 'error')
-            return redirect(url_for('index'))
-        
-        # Clean up file after a delay to allow download to complete
-        import threading
-        def delayed_cleanup():
-            import time
-            time.sleep(5)  # Wait 5 seconds to ensure download completes
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logging.info(f"Cleaned up file: {file_path}")
-            except Exception as e:
-                logging.error(f"Error cleaning up file: {str(e)}")
-        
-        # Start cleanup in background thread
-        cleanup_thread = threading.Thread(target=delayed_cleanup)
-        cleanup_thread.daemon = True
-        cleanup_thread.start()
-        
-        return send_file(
+        # safe_join is pure string handling; send_file's own stat() is the only existence check
+        file_path = safe_join(app.config['CONVERTED_FOLDER'], filename)
+        if file_path is None:
+            raise FileNotFoundError(filename)
+        
+        # Converted files are kept as a cache and evicted by size, not deleted per download
+        # Stored names are opaque tokens or digests; the friendly name comes from the URL
+        download_name = request.args.get('name') or filename
+        
+        # Passing a path (not an open file) keeps the zero-copy paths available:
+        # X-Sendfile when enabled, otherwise gunicorn's sendfile(2) file wrapper
+        response = send_file(
             file_path,
             as_attachment=True,
-            download_name=filename.split('_', 1)[1] if '_' in filename else filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            conditional=True,
+            etag=True,
+            download_name=download_name
         )
         
+        # nginx serves the body itself from the internal location named by the prefix
+        if X_ACCEL_REDIRECT_PREFIX and response.headers.pop('X-Sendfile', None):
+            response.headers['X-Accel-Redirect'] = f"{X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(filename)}"
+        
+        return response
+        
+    except FileNotFoundError:
+        flash('File not found or expired', 'error')
+        return redirect(url_for('pdf_tools'))
     except Exception as e:
         logging.error(f"Download error: {str(e)}")
         flash('Error downloading file', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('pdf_tools'))
 
 @app.errorhandler(413)
 def too_large(e):
@@ -0,0 +1,12 @@
+"""Gunicorn settings, picked up automatically when gunicorn starts from the project root."""
+import os
+
+# Conversion jobs are tracked in the worker's memory, so a single worker process
+# serves every request. Its threads keep uploads, status polls and downloads from
+# queueing behind one another while a request waits on socket or disk I/O.
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Stream file responses (converted downloads) straight from the page cache
+sendfile = True
@@ -154,7 +154,12 @@ async function convertFileExcel() {
         
         updateProgressExcel('Extracting tables...', 60);
         
-        const result = await response.json();
+        let result = await response.json();
+        
+        // Conversion runs in the background; wait for the job to finish
+        if (result.success && result.status_url) {
+            result = await waitForConversion(result.status_url);
+        }
         
         updateProgressExcel('Creating Excel file...', 85);
         
@@ -28,6 +28,20 @@ function formatFileSize(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
+// Poll a background conversion job until it finishes or fails
+async function waitForConversion(statusUrl) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        
+        if (job.status !== 'queued') {
+            return job;
+        }
+    }
+}
+
 // Validate file
 function validateFile(file) {
     // Check file type
@@ -152,9 +166,13 @@ async function convertFile() {
             body: formData
         });
         
-        updateProgress('Processing conversion...', 80);
+        let result = await response.json();
         
-        const result = await response.json();
+        // Conversion runs in the background; wait for the job to finish
+        if (result.success && result.status_url) {
+            updateProgress('Processing conversion...', 80);
+            result = await waitForConversion(result.status_url);
+        }
         
         updateProgress('Finalizing...', 95);
         